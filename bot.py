@@ -1,14 +1,24 @@
 import os
+import re
+import sys
 import asyncio
 import logging
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Set
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Set
 import aiohttp
+import orjson
 from aiohttp import TCPConnector
-import psycopg2
+from aiohttp.resolver import AsyncResolver
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from urllib.parse import urlparse
+from yarl import URL
 import time
-from threading import Lock
+from types import MappingProxyType
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from operator import itemgetter
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     Application,
@@ -34,94 +44,274 @@ logger = logging.getLogger(__name__)
 GUMROAD_LINK = os.getenv("GUMROAD_LINK", "https://gumroad.com/l/your-product")
 SUPPORT_USERNAME = os.getenv("SUPPORT_USERNAME", "@arbitragebotsupport")
 
+# Public HTTPS base URL for webhook mode; polling is used when unset
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_PORT = int(os.getenv("PORT", "8443"))
+# Sent by Telegram with every webhook update; requests without it are rejected
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+
+class Ticker(NamedTuple):
+    """Last price and 24h volume of one listing"""
+    price: float
+    volume: float
+
+# Parsed exchange payload: normalized symbol -> Ticker
+TickerMap = Dict[str, Ticker]
+
+# Major cryptocurrency exchanges with their APIs
+EXCHANGES = MappingProxyType({
+    'binance': 'https://api.binance.com/api/v3/ticker/24hr',
+    'kucoin': 'https://api.kucoin.com/api/v1/market/allTickers',
+    'gate': 'https://api.gateio.ws/api/v4/spot/tickers',
+    'mexc': 'https://api.mexc.com/api/v3/ticker/24hr',
+    'bybit': 'https://api.bybit.com/v5/market/tickers?category=spot',
+    'okx': 'https://www.okx.com/api/v5/market/tickers?instType=SPOT',
+    'huobi': 'https://api.huobi.pro/market/tickers',
+    'bitget': 'https://api.bitget.com/api/spot/v1/market/tickers',
+    'coinbase': 'https://api.exchange.coinbase.com/products',
+    'kraken': 'https://api.kraken.com/0/public/Ticker',
+    'bitfinex': 'https://api-pub.bitfinex.com/v2/tickers?symbols=ALL',
+    'cryptocom': 'https://api.crypto.com/v2/public/get-ticker',
+    'bingx': 'https://open-api.bingx.com/openApi/spot/v1/ticker/24hr',
+    'lbank': 'https://api.lbkex.com/v2/ticker/24hr.do',
+    'digifinex': 'https://openapi.digifinex.com/v3/ticker',
+    'bitmart': 'https://api-cloud.bitmart.com/spot/v1/ticker',
+    'xt': 'https://api.xt.com/data/api/v1/getTickers',
+    'phemex': 'https://api.phemex.com/md/ticker/24hr/all',
+    'bitstamp': 'https://www.bitstamp.net/api/v2/ticker/',
+    'gemini': 'https://api.gemini.com/v1/pricefeed',
+    'poloniex': 'https://api.poloniex.com/markets/ticker24h',
+    'ascendex': 'https://ascendex.com/api/pro/v1/ticker',
+    'coinex': 'https://api.coinex.com/v1/market/ticker/all',
+    'hotcoin': 'https://api.hotcoin.top/v1/market/ticker',
+    'bigone': 'https://big.one/api/v3/asset_pairs/tickers',
+    'probit': 'https://api.probit.com/api/exchange/v1/ticker',
+    'latoken': 'https://api.latoken.com/v2/ticker',
+    'bitrue': 'https://www.bitrue.com/api/v1/ticker/24hr',
+    'tidex': 'https://api.tidex.com/api/3/ticker',
+    'p2pb2b': 'https://api.p2pb2b.com/api/v2/public/tickers'
+})
+
+# Exchange names as shown to users
+EXCHANGE_DISPLAY_NAMES = MappingProxyType({name: name.capitalize() for name in EXCHANGES})
+
+# Ticker URLs parsed once so aiohttp doesn't re-parse the strings on every fetch
+EXCHANGE_URLS = MappingProxyType({name: URL(url) for name, url in EXCHANGES.items()})
+
+# Sent with every ticker request
+TICKER_HEADERS = MappingProxyType({
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+})
+
+# Trusted major cryptocurrencies
+TRUSTED_SYMBOLS = frozenset({
+    'BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'ADAUSDT', 'XRPUSDT', 
+    'SOLUSDT', 'DOTUSDT', 'DOGEUSDT', 'AVAXUSDT', 'MATICUSDT',
+    'LINKUSDT', 'LTCUSDT', 'BCHUSDT', 'UNIUSDT', 'ATOMUSDT',
+    'VETUSDT', 'FILUSDT', 'TRXUSDT', 'ETCUSDT', 'XLMUSDT',
+    'ALGOUSDT', 'ICPUSDT', 'THETAUSDT', 'AXSUSDT', 'SANDUSDT',
+    'MANAUSDT', 'CHZUSDT', 'ENJUSDT', 'GALAUSDT', 'APTUSDT',
+    'NEARUSDT', 'FLOWUSDT', 'AAVEUSDT', 'COMPUSDT', 'SUSHIUSDT',
+    'YFIUSDT', 'SNXUSDT', 'MKRUSDT', 'CRVUSDT', '1INCHUSDT',
+    'RUNEUSDT', 'LUNA2USDT', 'FTMUSDT', 'ONEUSDT', 'ZILUSDT',
+    'ZECUSDT', 'DASHUSDT', 'WAVESUSDT', 'ONTUSDT', 'QTUMUSDT'
+})
+
+# Suspicious symbols
+SUSPICIOUS_SYMBOLS = frozenset({
+    'SUN', 'MOON', 'DOGE', 'SHIB', 'PEPE', 'FLOKI', 'BABY',
+    'SAFE', 'MINI', 'MICRO', 'MEGA', 'SUPER', 'ULTRA', 'ELON',
+    'MARS', 'ROCKET', 'DIAMOND', 'GOLD', 'SILVER', 'TITAN',
+    'RISE', 'FIRE', 'ICE', 'SNOW', 'STORM', 'THUNDER', 'LIGHTNING'
+})
+
+# Matches any suspicious fragment in one scan of the name
+SUSPICIOUS_NAME_RE = re.compile('|'.join(map(re.escape, sorted(SUSPICIOUS_SYMBOLS))))
+
+# Symbol mapping
+SYMBOL_MAPPING = MappingProxyType({
+    'BTC/USDT': 'BTCUSDT',
+    'BTC-USDT': 'BTCUSDT',
+    'BTC_USDT': 'BTCUSDT',
+    'tBTCUSDT': 'BTCUSDT',
+    'ETH/USDT': 'ETHUSDT',
+    'ETH-USDT': 'ETHUSDT',
+    'ETH_USDT': 'ETHUSDT',
+    'tETHUSDT': 'ETHUSDT'
+})
+
+class ExchangeSpec(NamedTuple):
+    """Field layout of an exchange that returns a flat list of ticker objects"""
+    path: Tuple[str, ...]
+    symbol_key: str
+    price_key: str
+    volume_key: str
+    threshold_scale: float = 1.0
+    numeric_strings: bool = True
+
+# Exchanges parsed by the generic spec-driven parser
+EXCHANGE_SPECS = MappingProxyType({
+    'binance': ExchangeSpec((), 'symbol', 'lastPrice', 'quoteVolume'),
+    'kucoin': ExchangeSpec(('data', 'ticker'), 'symbol', 'last', 'volValue'),
+    'gate': ExchangeSpec((), 'currency_pair', 'last', 'quote_volume'),
+    'mexc': ExchangeSpec((), 'symbol', 'lastPrice', 'quoteVolume'),
+    'bybit': ExchangeSpec(('result', 'list'), 'symbol', 'lastPrice', 'turnover24h'),
+    'okx': ExchangeSpec(('data',), 'instId', 'last', 'volCcy24h'),
+    # Huobi reports base-asset volume, hence the lower bar
+    'huobi': ExchangeSpec(('data',), 'symbol', 'close', 'vol', 0.01, numeric_strings=False),
+    'bitget': ExchangeSpec(('data',), 'symbol', 'close', 'quoteVol'),
+})
+
+def _tickers_at(data: Any, path: Tuple[str, ...]) -> List[Dict]:
+    """Follow a spec path into a payload, or return [] when the shape is unexpected"""
+    for key in path:
+        if not isinstance(data, dict) or key not in data:
+            return []
+        data = data[key]
+    return data
+
+# Types orjson decodes JSON numbers to; parsers that skip float() accept only these
+JSON_NUMBER = (int, float)
+
+def make_spec_parser(exchange: str, spec: ExchangeSpec):
+    """Build a parser specialized to one exchange's field layout"""
+    # Field names are bound once and the string/number variant chosen up front
+    path = spec.path
+    symbol_key, price_key, volume_key = spec.symbol_key, spec.price_key, spec.volume_key
+    scale = spec.threshold_scale
+
+    if spec.numeric_strings:
+        def parse(data: Any, threshold: float, normalize) -> TickerMap:
+            threshold *= scale
+            result = {}
+            for item in _tickers_at(data, path):
+                raw_volume = item.get(volume_key)
+                if not raw_volume:
+                    continue
+                volume = float(raw_volume)
+                if volume > threshold:
+                    result[normalize(item[symbol_key], exchange)] = Ticker(float(item[price_key]), volume)
+            return result
+    else:
+        # orjson already yields floats for JSON numbers; null or string fields are skipped
+        def parse(data: Any, threshold: float, normalize) -> TickerMap:
+            threshold *= scale
+            result = {}
+            for item in _tickers_at(data, path):
+                volume = item.get(volume_key)
+                if not isinstance(volume, JSON_NUMBER) or volume <= threshold:
+                    continue
+                price = item.get(price_key)
+                if isinstance(price, JSON_NUMBER):
+                    result[normalize(item[symbol_key], exchange)] = Ticker(price, volume)
+            return result
+
+    parse.__name__ = f"parse_{exchange}"
+    return parse
+
+def parse_bitfinex(data: Any, threshold: float, normalize) -> TickerMap:
+    result = {}
+    if not isinstance(data, list):
+        return result
+    for item in data:
+        # Bitfinex v2 tickers are JSON numbers, already floats after decoding
+        if len(item) < 8:
+            continue
+        price, volume = item[6], item[7]
+        if not isinstance(price, JSON_NUMBER) or not isinstance(volume, JSON_NUMBER):
+            continue
+        if volume > threshold:
+            result[normalize(item[0], 'bitfinex')] = Ticker(price, volume)
+    return result
+
+def parse_kraken(data: Any, threshold: float, normalize) -> TickerMap:
+    result = {}
+    for symbol, ticker_data in data.get('result', {}).items():
+        if 'c' not in ticker_data or 'v' not in ticker_data:
+            continue
+        price = float(ticker_data['c'][0])
+        volume = float(ticker_data['v'][1]) * price
+        if volume > threshold:
+            result[normalize(symbol, 'kraken')] = Ticker(price, volume)
+    return result
+
+def parse_coinbase(data: Any, threshold: float, normalize) -> TickerMap:
+    result = {}
+    if not isinstance(data, list):
+        return result
+    for item in data:
+        if 'id' not in item or 'price' not in item or not item.get('volume_24h'):
+            continue
+        volume = float(item['volume_24h'])
+        if volume > threshold:
+            result[normalize(item['id'], 'coinbase')] = Ticker(float(item['price']), volume)
+    return result
+
+def parse_poloniex(data: Any, threshold: float, normalize) -> TickerMap:
+    result = {}
+    for symbol, ticker_data in data.items():
+        if 'close' not in ticker_data or 'quoteVolume' not in ticker_data:
+            continue
+        volume = float(ticker_data['quoteVolume'])
+        if volume > threshold:
+            result[normalize(symbol, 'poloniex')] = Ticker(float(ticker_data['close']), volume)
+    return result
+
+# Exchange name -> parser(data, threshold, normalize)
+EXCHANGE_PARSERS = MappingProxyType({
+    **{name: make_spec_parser(name, spec) for name, spec in EXCHANGE_SPECS.items()},
+    'bitfinex': parse_bitfinex,
+    'kraken': parse_kraken,
+    'coinbase': parse_coinbase,
+    'poloniex': parse_poloniex,
+})
+
+# Subscription plans
+SUBSCRIPTION_PLANS = MappingProxyType({
+    'Monthly': 30,
+    'Quarterly': 90,
+    'Every 6 months': 180,
+    'Yearly': 365
+})
+
 class ArbitrageBot:
+    # Shared read-only tables
+    exchanges = EXCHANGES
+    exchange_display_names = EXCHANGE_DISPLAY_NAMES
+    exchange_urls = EXCHANGE_URLS
+    ticker_headers = TICKER_HEADERS
+    trusted_symbols = TRUSTED_SYMBOLS
+    suspicious_symbols = SUSPICIOUS_SYMBOLS
+    suspicious_name_re = SUSPICIOUS_NAME_RE
+    symbol_mapping = SYMBOL_MAPPING
+    subscription_plans = SUBSCRIPTION_PLANS
+
     def __init__(self):
-        # Major cryptocurrency exchanges with their APIs
-        self.exchanges = {
-            'binance': 'https://api.binance.com/api/v3/ticker/24hr',
-            'kucoin': 'https://api.kucoin.com/api/v1/market/allTickers',
-            'gate': 'https://api.gateio.ws/api/v4/spot/tickers',
-            'mexc': 'https://api.mexc.com/api/v3/ticker/24hr',
-            'bybit': 'https://api.bybit.com/v5/market/tickers?category=spot',
-            'okx': 'https://www.okx.com/api/v5/market/tickers?instType=SPOT',
-            'huobi': 'https://api.huobi.pro/market/tickers',
-            'bitget': 'https://api.bitget.com/api/spot/v1/market/tickers',
-            'coinbase': 'https://api.exchange.coinbase.com/products',
-            'kraken': 'https://api.kraken.com/0/public/Ticker',
-            'bitfinex': 'https://api-pub.bitfinex.com/v2/tickers?symbols=ALL',
-            'cryptocom': 'https://api.crypto.com/v2/public/get-ticker',
-            'bingx': 'https://open-api.bingx.com/openApi/spot/v1/ticker/24hr',
-            'lbank': 'https://api.lbkex.com/v2/ticker/24hr.do',
-            'digifinex': 'https://openapi.digifinex.com/v3/ticker',
-            'bitmart': 'https://api-cloud.bitmart.com/spot/v1/ticker',
-            'xt': 'https://api.xt.com/data/api/v1/getTickers',
-            'phemex': 'https://api.phemex.com/md/ticker/24hr/all',
-            'bitstamp': 'https://www.bitstamp.net/api/v2/ticker/',
-            'gemini': 'https://api.gemini.com/v1/pricefeed',
-            'poloniex': 'https://api.poloniex.com/markets/ticker24h',
-            'ascendex': 'https://ascendex.com/api/pro/v1/ticker',
-            'coinex': 'https://api.coinex.com/v1/market/ticker/all',
-            'hotcoin': 'https://api.hotcoin.top/v1/market/ticker',
-            'bigone': 'https://big.one/api/v3/asset_pairs/tickers',
-            'probit': 'https://api.probit.com/api/exchange/v1/ticker',
-            'latoken': 'https://api.latoken.com/v2/ticker',
-            'bitrue': 'https://www.bitrue.com/api/v1/ticker/24hr',
-            'tidex': 'https://api.tidex.com/api/3/ticker',
-            'p2pb2b': 'https://api.p2pb2b.com/api/v2/public/tickers'
-        }
-        
-        # Trusted major cryptocurrencies
-        self.trusted_symbols = {
-            'BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'ADAUSDT', 'XRPUSDT', 
-            'SOLUSDT', 'DOTUSDT', 'DOGEUSDT', 'AVAXUSDT', 'MATICUSDT',
-            'LINKUSDT', 'LTCUSDT', 'BCHUSDT', 'UNIUSDT', 'ATOMUSDT',
-            'VETUSDT', 'FILUSDT', 'TRXUSDT', 'ETCUSDT', 'XLMUSDT',
-            'ALGOUSDT', 'ICPUSDT', 'THETAUSDT', 'AXSUSDT', 'SANDUSDT',
-            'MANAUSDT', 'CHZUSDT', 'ENJUSDT', 'GALAUSDT', 'APTUSDT',
-            'NEARUSDT', 'FLOWUSDT', 'AAVEUSDT', 'COMPUSDT', 'SUSHIUSDT',
-            'YFIUSDT', 'SNXUSDT', 'MKRUSDT', 'CRVUSDT', '1INCHUSDT',
-            'RUNEUSDT', 'LUNA2USDT', 'FTMUSDT', 'ONEUSDT', 'ZILUSDT',
-            'ZECUSDT', 'DASHUSDT', 'WAVESUSDT', 'ONTUSDT', 'QTUMUSDT'
-        }
-        
-        # Suspicious symbols
-        self.suspicious_symbols = {
-            'SUN', 'MOON', 'DOGE', 'SHIB', 'PEPE', 'FLOKI', 'BABY',
-            'SAFE', 'MINI', 'MICRO', 'MEGA', 'SUPER', 'ULTRA', 'ELON',
-            'MARS', 'ROCKET', 'DIAMOND', 'GOLD', 'SILVER', 'TITAN',
-            'RISE', 'FIRE', 'ICE', 'SNOW', 'STORM', 'THUNDER', 'LIGHTNING'
-        }
-        
-        # Symbol mapping
-        self.symbol_mapping = {
-            'BTC/USDT': 'BTCUSDT',
-            'BTC-USDT': 'BTCUSDT',
-            'BTC_USDT': 'BTCUSDT',
-            'tBTCUSDT': 'BTCUSDT',
-            'ETH/USDT': 'ETHUSDT',
-            'ETH-USDT': 'ETHUSDT',
-            'ETH_USDT': 'ETHUSDT',
-            'tETHUSDT': 'ETHUSDT'
-        }
+        # Symbol normalization: one translate pass, memoized since every
+        # refresh sees the same few thousand symbols per exchange
+        self._strip_table = str.maketrans('', '', '/-_')
+        self.normalize_symbol = lru_cache(maxsize=65536)(self._normalize_symbol)
+        # Name screening depends only on the symbol, so it is memoized the same way
+        self.has_suspicious_name = lru_cache(maxsize=65536)(self._has_suspicious_name)
         
         # Minimum 24h volume threshold
         self.min_volume_threshold = 100000
         
         # Profit thresholds
         self.max_profit_threshold = 20.0
+        self.min_profit_threshold = 0.1
         self.free_user_max_profit = 2.0
         self.admin_max_profit_threshold = 40.0
-
-        # Subscription plans
-        self.subscription_plans = {
-            'Monthly': 30,
-            'Quarterly': 90,
-            'Every 6 months': 180,
-            'Yearly': 365
-        }
         
-        # Premium users cache
-        self.premium_users = set()
+        # Premium users cache (in-memory source of truth, DB is persistence)
+        self.premium_users: Set[int] = set()
+        
+        # License keys known to be used, filled lazily from PostgreSQL
+        self.used_license_keys: Set[str] = set()
+        
+        # user_id -> (username, last upsert time), so repeat commands skip the write
+        self._saved_users: Dict[int, Tuple[str, float]] = {}
+        self.save_user_interval = 3600
         
         # Database connection
         self.DATABASE_URL = os.getenv("DATABASE_URL")
@@ -129,33 +319,56 @@ class ArbitrageBot:
             logger.error("DATABASE_URL environment variable not found!")
             raise ValueError("DATABASE_URL must be set for database connection.")
 
-        self.conn = None
+        # getconn() raises instead of waiting when the pool is exhausted, so callers
+        # (handler threads and the arbitrage writer) queue on this first
+        self.db_max_connections = 10
+        self._db_slots = threading.BoundedSemaphore(self.db_max_connections)
+        self.pool = self.create_db_pool()
         self.init_database()
         self.load_premium_users()
-        self.load_used_license_keys()
         
-        # Cache system
-        self.cache_data = {}
-        self.cache_timestamp = 0
+        # Cache system: (timestamp, data) swapped as one record, so readers need no lock
+        self.cache_snapshot: Tuple[float, Dict[str, TickerMap]] = (0, {})
         self.cache_duration = 30
-        self.cache_lock = Lock()
+        # Expired snapshots are served while a refresh runs, but only up to this age
+        self.max_stale_age = self.cache_duration * 3
+        self.cache_lock = asyncio.Lock()
+        # Background refreshes pause once nobody has read the cache for this long; the
+        # snapshot then ages past max_stale_age and the next reader waits for a fresh one
+        self.last_cache_access = 0
+        self.idle_refresh_timeout = 300
+        # (snapshot timestamp, full-range opportunities) computed from that snapshot
+        self._arbitrage_results: Optional[Tuple[float, List[Dict]]] = None
+        self._admin_arbitrage_results: Optional[Tuple[float, List[Dict]]] = None
         
         # API request limits
-        self.is_fetching = False
+        self._refresh_task: Optional[asyncio.Task] = None
         self.last_fetch_time = 0
         self.min_fetch_interval = 15
+        
+        # Per-exchange deadline so one slow API cannot hold up a refresh
+        self.exchange_timeout = aiohttp.ClientTimeout(total=5, connect=3)
 
-        # Connection pool
-        self.connector = TCPConnector(
-            limit=50,
-            limit_per_host=5,
-            ttl_dns_cache=300,
-            use_dns_cache=True,
-        )
+        # Connection pool (created with the session, inside the event loop)
+        self.connector = None
         self.session = None
         
-        # Request semaphore
-        self.request_semaphore = asyncio.Semaphore(10)
+        # Exchange request slots; the cap shrinks on HTTP 429 and recovers on success
+        self.max_request_slots = 10
+        self.request_slot_limit = self.max_request_slots
+        self._request_slots_in_use = 0
+        self._request_slots = asyncio.Condition()
+        
+        # Cap concurrent Gumroad verifications running in the background
+        self.license_semaphore = asyncio.Semaphore(10)
+        
+        # Arbitrage records waiting for the batched DB writer
+        self.arbitrage_queue: asyncio.Queue = asyncio.Queue()
+        
+        # /price request coalescing and rendered report cache
+        self._in_flight_price: Dict[str, asyncio.Task] = {}
+        self.price_report_cache: Dict[str, Tuple[float, str]] = {}
+        self.price_report_ttl = 5
         
         self.stats = {
             'cache_hits': 0,
@@ -164,29 +377,47 @@ class ArbitrageBot:
             'concurrent_users': 0
         }
 
+        # Exchange name -> response parser, resolved once instead of per refresh
+        self._parsers = EXCHANGE_PARSERS
+
+    def create_db_pool(self) -> ThreadedConnectionPool:
+        """Create the PostgreSQL connection pool."""
+        try:
+            url = urlparse(self.DATABASE_URL)
+            pool = ThreadedConnectionPool(
+                2, self.db_max_connections,
+                host=url.hostname,
+                port=url.port,
+                user=url.username,
+                password=url.password,
+                database=url.path[1:]
+            )
+            logger.info("Successfully connected to PostgreSQL database.")
+            return pool
+        except Exception as e:
+            logger.error(f"Error connecting to PostgreSQL: {e}")
+            raise
+
+    @contextmanager
     def get_db_connection(self):
-        """Get or create a PostgreSQL database connection."""
-        if self.conn is None or self.conn.closed:
+        """Borrow a pooled connection; commits on success, rolls back on error."""
+        with self._db_slots:
+            conn = self.pool.getconn()
             try:
-                url = urlparse(self.DATABASE_URL)
-                self.conn = psycopg2.connect(
-                    host=url.hostname,
-                    port=url.port,
-                    user=url.username,
-                    password=url.password,
-                    database=url.path[1:]
-                )
-                logger.info("Successfully connected to PostgreSQL database.")
-            except Exception as e:
-                logger.error(f"Error connecting to PostgreSQL: {e}")
+                yield conn
+                conn.commit()
+            except Exception:
+                if not conn.closed:
+                    conn.rollback()
                 raise
-        return self.conn
+            finally:
+                # Broken connections are discarded so the pool reconnects on demand
+                self.pool.putconn(conn, close=bool(conn.closed))
 
     def init_database(self):
         """Initialize PostgreSQL database tables."""
-        conn = self.get_db_connection()
         try:
-            with conn.cursor() as cursor:
+            with self.get_db_connection() as conn, conn.cursor() as cursor:
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS users (
                         user_id BIGINT PRIMARY KEY,
@@ -209,6 +440,10 @@ class ArbitrageBot:
                         timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 ''')
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS ix_arb_symbol_ts
+                    ON arbitrage_data (symbol, timestamp DESC)
+                ''')
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS premium_users (
                         user_id BIGINT PRIMARY KEY,
@@ -227,17 +462,14 @@ class ArbitrageBot:
                         gumroad_sale_id TEXT
                     )
                 ''')
-            conn.commit()
             logger.info("PostgreSQL tables initialized or already exist.")
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
-            conn.rollback()
 
     def load_premium_users(self):
         """Load premium users into memory from PostgreSQL."""
-        conn = self.get_db_connection()
         try:
-            with conn.cursor() as cursor:
+            with self.get_db_connection() as conn, conn.cursor() as cursor:
                 cursor.execute('SELECT user_id FROM premium_users')
                 results = cursor.fetchall()
                 self.premium_users = {row[0] for row in results}
@@ -246,17 +478,23 @@ class ArbitrageBot:
             logger.error(f"Error loading premium users: {e}")
             self.premium_users = set()
 
-    def load_used_license_keys(self):
-        """Load used license keys into memory from PostgreSQL."""
-        conn = self.get_db_connection()
+    def is_license_key_used(self, license_key: str) -> bool:
+        """Check whether a license key was already activated."""
+        if license_key in self.used_license_keys:
+            return True
+        
         try:
-            with conn.cursor() as cursor:
-                cursor.execute('SELECT license_key FROM license_keys')
-                results = cursor.fetchall()
-                self.used_license_keys = {row[0] for row in results}
+            with self.get_db_connection() as conn, conn.cursor() as cursor:
+                cursor.execute('SELECT 1 FROM license_keys WHERE license_key = %s', (license_key,))
+                used = cursor.fetchone() is not None
         except Exception as e:
-            logger.error(f"Error loading used license keys: {e}")
-            self.used_license_keys = set()
+            logger.error(f"Error checking license key: {e}")
+            return False
+        
+        # Used keys never become unused again, so they can be remembered
+        if used:
+            self.used_license_keys.add(license_key)
+        return used
 
     async def verify_gumroad_license(self, license_key: str) -> Dict:
         """Verify license key with Gumroad API"""
@@ -273,49 +511,48 @@ class ArbitrageBot:
                 'increment_uses_count': 'false'
             }
     
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        if result.get('success', False):
-                            purchase = result.get('purchase', {})
-                            
-                            # Gumroad'dan gelen subscription_ended_at bilgisini al
-                            subscription_end_date_str = purchase.get('subscription_ended_at')
-                            
-                            if subscription_end_date_str:
-                                try:
-                                    # Tarihi parse et (örnek format: "2023-12-31T23:59:59Z")
-                                    end_date = datetime.strptime(subscription_end_date_str, '%Y-%m-%dT%H:%M:%SZ')
-                                    result['purchase']['end_date'] = end_date
-                                    logger.info(f"Subscription end date from Gumroad: {end_date}")
-                                except ValueError as e:
-                                    logger.error(f"Error parsing subscription_ended_at: {e}")
-                                    # Fallback: Varsayılan üyelik süresi
-                                    product_name = purchase.get('product_name', 'Monthly')
-                                    days = self.subscription_plans.get(product_name, 30)
-                                    end_date = datetime.now() + timedelta(days=days)
-                                    result['purchase']['end_date'] = end_date
-                            else:
-                                # subscription_ended_at yoksa varsayılan üyelik süresi
+            session = await self.get_session()
+            async with session.post(url, headers=headers, json=data) as response:
+                if response.status == 200:
+                    result = await response.json(loads=orjson.loads)
+                    if result.get('success', False):
+                        purchase = result.get('purchase', {})
+                        
+                        # Gumroad'dan gelen subscription_ended_at bilgisini al
+                        subscription_end_date_str = purchase.get('subscription_ended_at')
+                        
+                        if subscription_end_date_str:
+                            try:
+                                # Tarihi parse et (örnek format: "2023-12-31T23:59:59Z")
+                                end_date = datetime.strptime(subscription_end_date_str, '%Y-%m-%dT%H:%M:%SZ')
+                                result['purchase']['end_date'] = end_date
+                                logger.info(f"Subscription end date from Gumroad: {end_date}")
+                            except ValueError as e:
+                                logger.error(f"Error parsing subscription_ended_at: {e}")
+                                # Fallback: Varsayılan üyelik süresi
                                 product_name = purchase.get('product_name', 'Monthly')
                                 days = self.subscription_plans.get(product_name, 30)
                                 end_date = datetime.now() + timedelta(days=days)
                                 result['purchase']['end_date'] = end_date
-                                
-                        return result
-                    else:
-                        response_text = await response.text()
-                        logger.error(f"Gumroad API error: {response.status} - {response_text}")
-                        return {'success': False, 'error': f'API Error: {response.status}'}
-        
+                        else:
+                            # subscription_ended_at yoksa varsayılan üyelik süresi
+                            product_name = purchase.get('product_name', 'Monthly')
+                            days = self.subscription_plans.get(product_name, 30)
+                            end_date = datetime.now() + timedelta(days=days)
+                            result['purchase']['end_date'] = end_date
+                            
+                    return result
+                else:
+                    response_text = await response.text()
+                    logger.error(f"Gumroad API error: {response.status} - {response_text}")
+                    return {'success': False, 'error': f'API Error: {response.status}'}
+    
         except Exception as e:
             logger.error(f"License verification error: {str(e)}")
             return {'success': False, 'error': str(e)}
 
     def activate_license_key(self, license_key: str, user_id: int, username: str, sale_data: Dict):
         """Activate license key using Gumroad's subscription_ended_at"""
-        conn = self.get_db_connection()
         try:
             # Gumroad'dan gelen end_date'i al
             end_date = sale_data.get('end_date')
@@ -330,210 +567,120 @@ class ArbitrageBot:
                 end_date = datetime.now() + timedelta(days=days)
                 logger.warning(f"Using fallback subscription duration for user {user_id}")
             
-            # PostgreSQL için tarih formatına çevir (YYYY-MM-DD)
-            end_date_str = end_date.strftime('%Y-%m-%d')
+            # DATE kolonu için doğrudan date nesnesi gönder
+            subscription_end = end_date.date()
             
-            with conn.cursor() as cursor:
-                # Save license key usage
-                cursor.execute('''
-                    INSERT INTO license_keys 
-                    (license_key, user_id, username, gumroad_sale_id)
-                    VALUES (%s, %s, %s, %s)
-                ''', (license_key, user_id, username, sale_data.get('sale_id', '')))
-                
-                # Add premium subscription with Gumroad's end date
+            with self.get_db_connection() as conn, conn.cursor() as cursor:
+                # Save license key usage and the premium subscription in one round trip
                 cursor.execute('''
+                    WITH used_key AS (
+                        INSERT INTO license_keys 
+                        (license_key, user_id, username, gumroad_sale_id)
+                        VALUES (%(license_key)s, %(user_id)s, %(username)s, %(sale_id)s)
+                    )
                     INSERT INTO premium_users 
                     (user_id, username, subscription_end)
-                    VALUES (%s, %s, %s)
+                    VALUES (%(user_id)s, %(username)s, %(subscription_end)s)
                     ON CONFLICT (user_id) DO UPDATE SET 
                         username = EXCLUDED.username,
                         subscription_end = EXCLUDED.subscription_end,
                         added_date = CURRENT_TIMESTAMP
-                ''', (user_id, username, end_date_str))
-                
-            conn.commit()
+                ''', {
+                    'license_key': license_key,
+                    'user_id': user_id,
+                    'username': username,
+                    'sale_id': sale_data.get('sale_id', ''),
+                    'subscription_end': subscription_end
+                })
             
             # Update memory cache
             self.used_license_keys.add(license_key)
             self.premium_users.add(user_id)
             
-            logger.info(f"License activated for user {user_id} until {end_date_str}")
+            logger.info(f"License activated for user {user_id} until {subscription_end}")
             return end_date  # Aktivasyon tarihini döndür
         except Exception as e:
             logger.error(f"Error activating license key: {e}")
-            conn.rollback()
             raise
 
-    def normalize_symbol(self, symbol: str, exchange: str) -> str:
+    def _normalize_symbol(self, symbol: str, exchange: str) -> str:
         """Normalize symbol format across exchanges"""
-        normalized = symbol.upper().replace('/', '').replace('-', '').replace('_', '')
+        # Explicit mappings win outright, so skip the string work for them
+        mapped = self.symbol_mapping.get(symbol)
+        if mapped is not None:
+            return sys.intern(mapped)
+        
+        normalized = symbol.translate(self._strip_table).upper()
         
         if exchange == 'bitfinex' and normalized.startswith('T'):
             normalized = normalized[1:]
         
-        if symbol in self.symbol_mapping:
-            normalized = self.symbol_mapping[symbol]
-        
-        return normalized
+        # One shared string per symbol across exchanges keeps dict lookups on the identity fast path
+        return sys.intern(normalized)
 
-    async def fetch_prices_with_volume(self, exchange: str) -> Dict[str, Dict]:
+    def _has_suspicious_name(self, symbol: str) -> bool:
+        """Check the symbol's base asset for suspicious name fragments"""
+        base_symbol = symbol.replace('USDT', '').replace('USDC', '').replace('BUSD', '')
+        return self.suspicious_name_re.search(base_symbol.upper()) is not None
+
+    @asynccontextmanager
+    async def request_slot(self):
+        """Hold one of the currently allowed concurrent exchange requests"""
+        async with self._request_slots:
+            await self._request_slots.wait_for(lambda: self._request_slots_in_use < self.request_slot_limit)
+            self._request_slots_in_use += 1
+        try:
+            yield
+        finally:
+            async with self._request_slots:
+                self._request_slots_in_use -= 1
+                self._request_slots.notify()
+
+    async def resize_request_slots(self, delta: int):
+        """Tighten or relax the concurrent exchange request cap"""
+        async with self._request_slots:
+            limit = min(self.max_request_slots, max(1, self.request_slot_limit + delta))
+            if limit != self.request_slot_limit:
+                self.request_slot_limit = limit
+                self._request_slots.notify_all()
+
+    async def fetch_prices_with_volume(self, exchange: str) -> TickerMap:
         """Fetch prices and volumes from exchange"""
-        async with self.request_semaphore:
+        async with self.request_slot():
             try:
                 session = await self.get_session()
-                url = self.exchanges[exchange]
-                
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
+                url = self.exchange_urls[exchange]
                 
-                async with session.get(url, headers=headers) as response:
+                async with session.get(url, headers=self.ticker_headers, timeout=self.exchange_timeout) as response:
+                    if response.status == 429:
+                        logger.warning(f"{exchange} rate limited us, lowering concurrent requests")
+                        await self.resize_request_slots(-1)
+                        return {}
                     if response.status != 200:
                         logger.warning(f"{exchange} returned status {response.status}")
                         return {}
                     
-                    data = await response.json()
-                    return self.parse_exchange_data(exchange, data)
+                    data = orjson.loads(await response.read())
+                
+                if self.request_slot_limit < self.max_request_slots:
+                    await self.resize_request_slots(1)
+                return self.parse_exchange_data(exchange, data)
                     
+            except asyncio.TimeoutError:
+                logger.warning(f"{exchange} timed out after {self.exchange_timeout.total}s")
+                return {}
             except Exception as e:
                 logger.error(f"{exchange} price/volume error: {str(e)}")
                 return {}
 
-    def parse_exchange_data(self, exchange: str, data) -> Dict[str, Dict]:
+    def parse_exchange_data(self, exchange: str, data: Any) -> TickerMap:
         """Parse exchange-specific data format"""
+        parser = self._parsers.get(exchange)
+        if parser is None:
+            return {}
+        
         try:
-            if exchange == 'binance':
-                return {
-                    self.normalize_symbol(item['symbol'], exchange): {
-                        'price': float(item['lastPrice']),
-                        'volume': float(item['quoteVolume']),
-                        'count': int(item['count'])
-                    } for item in data 
-                    if float(item['quoteVolume']) > self.min_volume_threshold
-                }
-            
-            elif exchange == 'kucoin':
-                if 'data' in data and 'ticker' in data['data']:
-                    return {
-                        self.normalize_symbol(item['symbol'], exchange): {
-                            'price': float(item['last']),
-                            'volume': float(item['volValue']) if item['volValue'] else 0
-                        } for item in data['data']['ticker'] 
-                        if item['volValue'] and float(item['volValue']) > self.min_volume_threshold
-                    }
-            
-            elif exchange == 'gate':
-                return {
-                    self.normalize_symbol(item['currency_pair'], exchange): {
-                        'price': float(item['last']),
-                        'volume': float(item['quote_volume']) if item['quote_volume'] else 0
-                    } for item in data 
-                    if item['quote_volume'] and float(item['quote_volume']) > self.min_volume_threshold
-                }
-            
-            elif exchange == 'mexc':
-                return {
-                    self.normalize_symbol(item['symbol'], exchange): {
-                        'price': float(item['lastPrice']),
-                        'volume': float(item['quoteVolume'])
-                    } for item in data 
-                    if float(item.get('quoteVolume', 0)) > self.min_volume_threshold
-                }
-            
-            elif exchange == 'bybit':
-                if 'result' in data and 'list' in data['result']:
-                    return {
-                        self.normalize_symbol(item['symbol'], exchange): {
-                            'price': float(item['lastPrice']),
-                            'volume': float(item['turnover24h']) if item['turnover24h'] else 0
-                        } for item in data['result']['list'] 
-                        if item['turnover24h'] and float(item['turnover24h']) > self.min_volume_threshold
-                    }
-            
-            elif exchange == 'okx':
-                if 'data' in data:
-                    return {
-                        self.normalize_symbol(item['instId'], exchange): {
-                            'price': float(item['last']),
-                            'volume': float(item['volCcy24h']) if item['volCcy24h'] else 0
-                        } for item in data['data'] 
-                        if item['volCcy24h'] and float(item['volCcy24h']) > self.min_volume_threshold
-                    }
-            
-            elif exchange == 'huobi':
-                if 'data' in data:
-                    return {
-                        self.normalize_symbol(item['symbol'], exchange): {
-                            'price': float(item['close']),
-                            'volume': float(item['vol']) if item['vol'] else 0
-                        } for item in data['data'] 
-                        if item['vol'] and float(item['vol']) > self.min_volume_threshold / 100
-                    }
-            
-            elif exchange == 'bitget':
-                if 'data' in data:
-                    return {
-                        self.normalize_symbol(item['symbol'], exchange): {
-                            'price': float(item['close']),
-                            'volume': float(item['quoteVol']) if item['quoteVol'] else 0
-                        } for item in data['data'] 
-                        if item['quoteVol'] and float(item['quoteVol']) > self.min_volume_threshold
-                    }
-            
-            elif exchange == 'bitfinex':
-                if isinstance(data, list):
-                    result = {}
-                    for item in data:
-                        if len(item) >= 8:
-                            symbol = self.normalize_symbol(item[0], exchange)
-                            if item[7] and float(item[7]) > self.min_volume_threshold:
-                                result[symbol] = {
-                                    'price': float(item[6]),
-                                    'volume': float(item[7])
-                                }
-                    return result
-            
-            elif exchange == 'kraken':
-                result = {}
-                for symbol, ticker_data in data.get('result', {}).items():
-                    if 'c' in ticker_data and 'v' in ticker_data:
-                        normalized_symbol = self.normalize_symbol(symbol, exchange)
-                        volume = float(ticker_data['v'][1]) * float(ticker_data['c'][0])
-                        if volume > self.min_volume_threshold:
-                            result[normalized_symbol] = {
-                                'price': float(ticker_data['c'][0]),
-                                'volume': volume
-                            }
-                return result
-            
-            elif exchange == 'coinbase':
-                if isinstance(data, list):
-                    result = {}
-                    for item in data:
-                        if 'id' in item and 'price' in item and 'volume_24h' in item:
-                            symbol = self.normalize_symbol(item['id'], exchange)
-                            volume = float(item['volume_24h']) if item['volume_24h'] else 0
-                            if volume > self.min_volume_threshold:
-                                result[symbol] = {
-                                    'price': float(item['price']),
-                                    'volume': volume
-                                }
-                    return result
-            
-            elif exchange == 'poloniex':
-                result = {}
-                for symbol, ticker_data in data.items():
-                    if 'close' in ticker_data and 'quoteVolume' in ticker_data:
-                        normalized_symbol = self.normalize_symbol(symbol, exchange)
-                        volume = float(ticker_data['quoteVolume'])
-                        if volume > self.min_volume_threshold:
-                            result[normalized_symbol] = {
-                                'price': float(ticker_data['close']),
-                                'volume': volume
-                            }
-                return result
-            
+            return parser(data, self.min_volume_threshold, self.normalize_symbol)
         except Exception as e:
             logger.error(f"Error parsing {exchange} data: {str(e)}")
         
@@ -542,66 +689,119 @@ class ArbitrageBot:
     async def get_session(self):
         """Get shared session"""
         if self.session is None or self.session.closed:
+            # Async (c-ares) resolver keeps DNS lookups off the default thread pool
+            self.connector = TCPConnector(
+                resolver=AsyncResolver(),
+                limit=50,
+                limit_per_host=5,
+                ttl_dns_cache=300,
+                use_dns_cache=True,
+                # Outlive the 30s refresh cycle so pooled TLS connections are reused
+                keepalive_timeout=60,
+            )
             timeout = aiohttp.ClientTimeout(total=10, connect=5)
             self.session = aiohttp.ClientSession(
                 connector=self.connector,
                 timeout=timeout,
-                headers={'User-Agent': 'ArbitrageBot/1.0'}
+                headers={'User-Agent': 'ArbitrageBot/1.0'},
+                json_serialize=lambda obj: orjson.dumps(obj).decode()
             )
         return self.session
 
+    async def warm_up_connections(self):
+        """Resolve and connect to every exchange host ahead of the first fetch"""
+        session = await self.get_session()
+        
+        async def warm_up(url: URL):
+            try:
+                async with session.head(url.origin()):
+                    pass
+            except Exception as e:
+                logger.warning(f"Warm-up failed for {url.host}: {e}")
+        
+        await asyncio.gather(*(warm_up(self.exchange_urls[name]) for name in self._parsers))
+        logger.info(f"Warmed up connections to {len(self._parsers)} exchanges")
+
     async def get_cached_arbitrage_data(self, is_premium: bool = False):
         """Get data from cache or fetch fresh"""
+        await self.get_cached_exchange_data()
+        return self.get_snapshot_arbitrage(is_premium)
+
+    async def get_cached_exchange_data(self) -> Dict[str, TickerMap]:
+        """Get raw exchange data from cache; recently expired data is served while it refreshes"""
         current_time = time.time()
+        self.last_cache_access = current_time
+        cache_timestamp, cache_data = self.cache_snapshot
+        cache_age = current_time - cache_timestamp
     
-        with self.cache_lock:
-            if (current_time - self.cache_timestamp) < self.cache_duration and self.cache_data:
-                logger.info("Returning cached data")
-                return self.calculate_arbitrage(self.cache_data, is_premium)
+        if not cache_data or cache_age >= self.max_stale_age:
+            # Nothing recent enough to show as live prices, so this caller waits for the fetch
+            return await self.refresh_cache()
         
-            if self.is_fetching:
-                if self.cache_data:
-                    logger.info("Fetch in progress, returning last cached data")
-                    return self.calculate_arbitrage(self.cache_data, is_premium)
+        if cache_age >= self.cache_duration:
+            if self._refresh_task is not None:
+                logger.info("Fetch in progress, returning last cached data")
+            elif (current_time - self.last_fetch_time) < self.min_fetch_interval:
+                logger.info("Rate limit protection, returning cached data")
+            else:
+                logger.info("Cache expired, refreshing in background")
+                self.start_cache_refresh()
+        
+        return cache_data
+    
+    def get_snapshot_arbitrage(self, is_premium: bool) -> List[Dict]:
+        """Opportunities for the current cache snapshot, computed once per snapshot"""
+        cache_timestamp, cache_data = self.cache_snapshot
+        cached = self._arbitrage_results
+        if cached is None or cached[0] != cache_timestamp:
+            cached = (cache_timestamp, self.calculate_arbitrage(cache_data))
+            self._arbitrage_results = cached
         
-            if (current_time - self.last_fetch_time) < self.min_fetch_interval:
-                if self.cache_data:
-                    logger.info("Rate limit protection, returning cached data")
-                    return self.calculate_arbitrage(self.cache_data, is_premium)
-    
-        return await self._fetch_fresh_data(is_premium)
-
-    async def _fetch_fresh_data(self, is_premium: bool):
-        """Fetch fresh data and cache it"""
-        with self.cache_lock:
-            if self.is_fetching:
-                if self.cache_data:
-                    return self.calculate_arbitrage(self.cache_data, is_premium)
+        opportunities = cached[1]
+        if is_premium:
+            return opportunities
+        # The free tier only differs by its profit cap, so it filters the shared scan
+        max_profit = self.free_user_max_profit
+        return [opp for opp in opportunities if opp['profit_percent'] <= max_profit]
+    
+    async def refresh_cache(self) -> Dict[str, TickerMap]:
+        """Refresh cached exchange data, joining a refresh already in flight"""
+        async with self.cache_lock:
+            task = self.start_cache_refresh()
         
-            self.is_fetching = True
+        # Shielded so a cancelled caller does not abort the shared refresh
+        return await asyncio.shield(task)
     
+    def start_cache_refresh(self) -> asyncio.Task:
+        """Start the cache refresh task unless one is already in flight"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_cache_data())
+        return self._refresh_task
+    
+    async def _refresh_cache_data(self) -> Dict[str, TickerMap]:
+        """Single in-flight fetch of all exchanges into the cache"""
         try:
             logger.info("Fetching fresh data from exchanges")
             all_data = await self.get_all_prices_with_volume()
         
-            with self.cache_lock:
-                self.cache_data = all_data
-                self.cache_timestamp = time.time()
-                self.last_fetch_time = time.time()
+            now = time.time()
+            self.cache_snapshot = (now, all_data)
+            self.last_fetch_time = now
         
-            return self.calculate_arbitrage(all_data, is_premium)
+            return all_data
     
         finally:
-            with self.cache_lock:
-                self.is_fetching = False
+            self._refresh_task = None
     
-    async def get_all_prices_with_volume(self) -> Dict[str, Dict[str, Dict]]:
+    async def get_all_prices_with_volume(self) -> Dict[str, TickerMap]:
         """Fetch price and volume data from all exchanges"""
-        tasks = [self.fetch_prices_with_volume(exchange) for exchange in self.exchanges]
+        # Exchanges without a parser would always come back empty, so skip the round trip
+        exchanges = list(self._parsers)
+        tasks = [self.fetch_prices_with_volume(exchange) for exchange in exchanges]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         exchange_data = {}
-        for exchange, result in zip(self.exchanges.keys(), results):
+        for exchange, result in zip(exchanges, results):
             if isinstance(result, Exception):
                 logger.error(f"Error fetching {exchange}: {result}")
                 exchange_data[exchange] = {}
@@ -618,54 +818,61 @@ class ArbitrageBot:
         """
         normalized_symbol_to_find = self.normalize_symbol(symbol_to_find, "general")
         
-        all_exchange_data = await self.get_all_prices_with_volume()
+        all_exchange_data = await self.get_cached_exchange_data()
         
         found_prices = []
         for exchange_name, data_for_exchange in all_exchange_data.items():
             if normalized_symbol_to_find in data_for_exchange:
-                price = data_for_exchange[normalized_symbol_to_find]['price']
+                price = data_for_exchange[normalized_symbol_to_find].price
                 if price > 0:
                     found_prices.append((exchange_name, price))
         
         found_prices.sort(key=lambda x: x[1])
         return found_prices
     
-    def is_symbol_safe(self, symbol: str, exchange_data: Dict[str, Dict]) -> Tuple[bool, str]:
+    def is_symbol_safe(self, symbol: str, exchange_data: Dict[str, Ticker]) -> Tuple[bool, str]:
         """Check if symbol is safe for arbitrage and return reason."""
-        logger.info(f"Checking safety for symbol: {symbol}")
-        logger.info(f"Exchange data for {symbol}: {exchange_data}")
+        # Runs for every candidate symbol, so the step-by-step trace is only built when asked for
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"Checking safety for symbol: {symbol}")
+            logger.debug(f"Exchange data for {symbol}: {exchange_data}")
 
         if symbol in self.trusted_symbols:
-            logger.info(f"{symbol} is a trusted symbol.")
+            if debug:
+                logger.debug(f"{symbol} is a trusted symbol.")
             return (True, "✅ Trusted symbol with verified history and high liquidity.")
         
-        volumes = [data.get('volume', 0) for data in exchange_data.values()]
-        non_zero_volumes = [v for v in volumes if v > 0]
-        logger.info(f"Non-zero volumes for {symbol}: {non_zero_volumes}")
+        threshold = self.min_volume_threshold
+        non_zero_volumes = [v for data in exchange_data.values() if (v := data.volume) > 0]
+        if debug:
+            logger.debug(f"Non-zero volumes for {symbol}: {non_zero_volumes}")
 
         if not non_zero_volumes:
             logger.warning(f"No current volume data available for {symbol}.")
             return (False, "❌ No current volume data available on any exchange.")
 
         total_volume = sum(non_zero_volumes)
-        exchanges_with_sufficient_volume = sum(1 for v in non_zero_volumes if v >= self.min_volume_threshold)
-        logger.info(f"Total volume for {symbol}: ${total_volume:,.0f}, Exchanges with sufficient volume: {exchanges_with_sufficient_volume}")
+        exchanges_with_sufficient_volume = sum(1 for v in non_zero_volumes if v >= threshold)
+        if debug:
+            logger.debug(f"Total volume for {symbol}: ${total_volume:,.0f}, Exchanges with sufficient volume: {exchanges_with_sufficient_volume}")
         
-        base_symbol = symbol.replace('USDT', '').replace('USDC', '').replace('BUSD', '')
-        is_suspicious_name = any(suspicious in base_symbol.upper() for suspicious in self.suspicious_symbols)
-        logger.info(f"Is {symbol} a suspicious name? {is_suspicious_name}")
+        is_suspicious_name = self.has_suspicious_name(symbol)
+        if debug:
+            logger.debug(f"Is {symbol} a suspicious name? {is_suspicious_name}")
 
         if is_suspicious_name:
-            if total_volume > self.min_volume_threshold * 5 and exchanges_with_sufficient_volume >= 3:
-                logger.info(f"Suspicious symbol {symbol} deemed safe due to high volume and sufficient exchanges.")
+            if total_volume > threshold * 5 and exchanges_with_sufficient_volume >= 3:
+                if debug:
+                    logger.debug(f"Suspicious symbol {symbol} deemed safe due to high volume and sufficient exchanges.")
                 return (True, f"🔍 Symbol has a suspicious name, but is deemed safe due to high total volume (${total_volume:,.0f}) and presence on {exchanges_with_sufficient_volume} major exchanges.")
             else:
                 logger.warning(f"Suspicious symbol {symbol} deemed unsafe. Total volume: ${total_volume:,.0f}, Exchanges with sufficient volume: {exchanges_with_sufficient_volume}.")
                 return (False, f"❌ Symbol has a suspicious name. Total volume (${total_volume:,.0f}) is insufficient or not present on enough major exchanges ({exchanges_with_sufficient_volume} of minimum 3 needed for suspicious symbols).")
 
-        if total_volume < self.min_volume_threshold * 2:
-            logger.warning(f"Total volume for {symbol} (${total_volume:,.0f}) is below the required threshold (${self.min_volume_threshold * 2:,.0f}).")
-            return (False, f"❌ Total volume (${total_volume:,.0f}) is below the required threshold (${self.min_volume_threshold * 2:,.0f}).")
+        if total_volume < threshold * 2:
+            logger.warning(f"Total volume for {symbol} (${total_volume:,.0f}) is below the required threshold (${threshold * 2:,.0f}).")
+            return (False, f"❌ Total volume (${total_volume:,.0f}) is below the required threshold (${threshold * 2:,.0f}).")
         
         if exchanges_with_sufficient_volume < 2:
             logger.warning(f"{symbol} found on only {exchanges_with_sufficient_volume} exchange(s) with sufficient volume (minimum 2 required).")
@@ -678,7 +885,8 @@ class ArbitrageBot:
                 logger.warning(f"Significant volume discrepancy detected for {symbol}. Max volume (${max_vol:,.0f}) is more than 100x minimum volume (${min_vol:,.0f}).")
                 return (False, f"❌ Significant volume discrepancy detected. Max volume (${max_vol:,.0f}) is more than 100x minimum volume (${min_vol:,.0f}), indicating potential liquidity issues or data anomalies.")
 
-        logger.info(f"{symbol} met general safety criteria.")
+        if debug:
+            logger.debug(f"{symbol} met general safety criteria.")
         return (True, f"✅ General safety criteria met: Sufficient total volume (${total_volume:,.0f}) and presence on {exchanges_with_sufficient_volume} exchanges.")
     
     def validate_arbitrage_opportunity(self, opportunity: Dict) -> bool:
@@ -691,64 +899,67 @@ class ArbitrageBot:
         if price_ratio > 1.3:
             return False
         
-        if opportunity['profit_percent'] < 0.1:
+        if opportunity['profit_percent'] < self.min_profit_threshold:
             return False
         
         return True
     
-    def calculate_arbitrage(self, all_data: Dict[str, Dict[str, Dict]], is_premium: bool = False) -> List[Dict]:
-        """Enhanced arbitrage calculation"""
+    def calculate_arbitrage(self, all_data: Dict[str, TickerMap]) -> List[Dict]:
+        """Enhanced arbitrage calculation over the full profit range; tier caps are applied by callers"""
         opportunities = []
         
-        all_symbols = set()
-        for exchange_data in all_data.values():
-            if exchange_data:
-                all_symbols.update(exchange_data.keys())
+        # Group tickers by symbol in one pass over every exchange
+        symbol_index: Dict[str, Dict[str, Ticker]] = {}
+        for exchange, exchange_data in all_data.items():
+            for symbol, data in exchange_data.items():
+                listings = symbol_index.get(symbol)
+                if listings is None:
+                    symbol_index[symbol] = {exchange: data}
+                else:
+                    listings[exchange] = data
         
-        common_symbols = set()
-        for symbol in all_symbols:
-            exchanges_with_symbol = sum(1 for exchange_data in all_data.values() if symbol in exchange_data)
-            if exchanges_with_symbol >= 2:
-                common_symbols.add(symbol)
+        common_symbols = {symbol: listings for symbol, listings in symbol_index.items() if len(listings) >= 2}
         
         logger.info(f"Found {len(common_symbols)} common symbols")
         
-        for symbol in common_symbols:
-            exchange_data = {ex: all_data[ex][symbol] for ex in all_data if symbol in all_data[ex]}
+        min_profit = self.min_profit_threshold
+        for symbol, exchange_data in common_symbols.items():
+            # Single pass for the cheapest and dearest venue; ties resolve as the old stable sort did
+            lowest_price = highest_price = None
+            for ex, data in exchange_data.items():
+                price = data.price
+                if lowest_price is None or price < lowest_price:
+                    lowest_ex, lowest_data, lowest_price = ex, data, price
+                if highest_price is None or price >= highest_price:
+                    highest_ex, highest_data, highest_price = ex, data, price
+            
+            if lowest_price <= 0:
+                continue
+            profit_percent = ((highest_price - lowest_price) / lowest_price) * 100
+            # Most symbols have no usable spread; reject them before the costlier safety checks
+            if profit_percent < min_profit:
+                continue
             
             is_safe, _ = self.is_symbol_safe(symbol, exchange_data)
             if not is_safe:
                 continue
             
-            if len(exchange_data) >= 2:
-                sorted_exchanges = sorted(exchange_data.items(), key=lambda x: x[1]['price'])
-                lowest_ex, lowest_data = sorted_exchanges[0]
-                highest_ex, highest_data = sorted_exchanges[-1]
-                
-                lowest_price = lowest_data['price']
-                highest_price = highest_data['price']
-                
-                if lowest_price > 0:
-                    profit_percent = ((highest_price - lowest_price) / lowest_price) * 100
-                    
-                    opportunity = {
-                        'symbol': symbol,
-                        'buy_exchange': lowest_ex,
-                        'sell_exchange': highest_ex,
-                        'buy_price': lowest_price,
-                        'sell_price': highest_price,
-                        'profit_percent': profit_percent,
-                        'buy_volume': lowest_data.get('volume', 0),
-                        'sell_volume': highest_data.get('volume', 0),
-                        'avg_volume': (lowest_data.get('volume', 0) + highest_data.get('volume', 0)) / 2
-                    }
-                    
-                    if self.validate_arbitrage_opportunity(opportunity):
-                        if not is_premium and opportunity['profit_percent'] > self.free_user_max_profit:
-                            continue
-                        opportunities.append(opportunity)
+            opportunity = {
+                'symbol': symbol,
+                'buy_exchange': lowest_ex,
+                'sell_exchange': highest_ex,
+                'buy_price': lowest_price,
+                'sell_price': highest_price,
+                'profit_percent': profit_percent,
+                'buy_volume': lowest_data.volume,
+                'sell_volume': highest_data.volume,
+                'avg_volume': (lowest_data.volume + highest_data.volume) / 2
+            }
+            
+            if self.validate_arbitrage_opportunity(opportunity):
+                opportunities.append(opportunity)
         
-        return sorted(opportunities, key=lambda x: x['profit_percent'], reverse=True)
+        return sorted(opportunities, key=itemgetter('profit_percent'), reverse=True)
     
     def is_premium_user(self, user_id: int) -> bool:
         """Check if user is premium"""
@@ -756,9 +967,13 @@ class ArbitrageBot:
     
     def save_user(self, user_id: int, username: str):
         """Save user to PostgreSQL database."""
-        conn = self.get_db_connection()
+        now = time.time()
+        saved = self._saved_users.get(user_id)
+        if saved is not None and saved[0] == username and (now - saved[1]) < self.save_user_interval:
+            return
+        
         try:
-            with conn.cursor() as cursor:
+            with self.get_db_connection() as conn, conn.cursor() as cursor:
                 cursor.execute('''
                     INSERT INTO users (user_id, username)
                     VALUES (%s, %s)
@@ -766,41 +981,60 @@ class ArbitrageBot:
                         username = EXCLUDED.username,
                         added_date = CURRENT_TIMESTAMP
                 ''', (user_id, username))
-            conn.commit()
+            self._saved_users[user_id] = (username, now)
         except Exception as e:
             logger.error(f"Error saving user: {e}")
-            conn.rollback()
     
     def save_arbitrage_data(self, opportunity: Dict):
-        """Save arbitrage data to PostgreSQL."""
-        conn = self.get_db_connection()
+        """Queue arbitrage data for the batched PostgreSQL writer."""
+        self.arbitrage_queue.put_nowait((
+            opportunity['symbol'],
+            opportunity['buy_exchange'],
+            opportunity['sell_exchange'],
+            opportunity['buy_price'],
+            opportunity['sell_price'],
+            opportunity['profit_percent'],
+            opportunity['avg_volume']
+        ))
+    
+    def insert_arbitrage_rows(self, rows: List[Tuple]):
+        """Insert a batch of arbitrage records into PostgreSQL."""
         try:
-            with conn.cursor() as cursor:
-                cursor.execute('''
+            with self.get_db_connection() as conn, conn.cursor() as cursor:
+                execute_values(cursor, '''
                     INSERT INTO arbitrage_data 
                     (symbol, exchange1, exchange2, price1, price2, profit_percent, volume_24h)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                ''', (
-                    opportunity['symbol'],
-                    opportunity['buy_exchange'],
-                    opportunity['sell_exchange'],
-                    opportunity['buy_price'],
-                    opportunity['sell_price'],
-                    opportunity['profit_percent'],
-                    opportunity['avg_volume']
-                ))
-            conn.commit()
+                    VALUES %s
+                ''', rows)
         except Exception as e:
             logger.error(f"Error saving arbitrage data: {e}")
-            conn.rollback()
+    
+    def flush_arbitrage_queue(self):
+        """Write every queued arbitrage record in one batch."""
+        rows = []
+        while not self.arbitrage_queue.empty():
+            rows.append(self.arbitrage_queue.get_nowait())
+        if rows:
+            self.insert_arbitrage_rows(rows)
+    
+    async def arbitrage_writer_task(self):
+        """Flush queued arbitrage records about once per second"""
+        while True:
+            rows = [await self.arbitrage_queue.get()]
+            # Let the rest of the burst queue up before writing
+            await asyncio.sleep(1)
+            while not self.arbitrage_queue.empty():
+                rows.append(self.arbitrage_queue.get_nowait())
+            await asyncio.to_thread(self.insert_arbitrage_rows, rows)
     
     def get_premium_users_list(self) -> List[Dict]:
         """Get list of premium users from PostgreSQL."""
-        conn = self.get_db_connection()
         try:
-            with conn.cursor() as cursor:
+            with self.get_db_connection() as conn, conn.cursor() as cursor:
+                # Display formatting happens in PostgreSQL so rows arrive ready to print
                 cursor.execute('''
-                    SELECT user_id, username, subscription_end, added_date 
+                    SELECT user_id, COALESCE(NULLIF(username, ''), 'Unknown'),
+                           TO_CHAR(subscription_end, 'YYYY-MM-DD'), added_date 
                     FROM premium_users 
                     ORDER BY added_date DESC
                 ''')
@@ -808,7 +1042,7 @@ class ArbitrageBot:
                 return [
                     {
                         'user_id': row[0],
-                        'username': row[1] or 'Unknown',
+                        'username': row[1],
                         'subscription_end': row[2],
                         'added_date': row[3]
                     } for row in results
@@ -817,11 +1051,37 @@ class ArbitrageBot:
             logger.error(f"Error getting premium users list: {e}")
             return []
 
+    def get_subscription_end(self, user_id: int) -> str:
+        """Get a premium user's subscription end date as text from PostgreSQL."""
+        try:
+            with self.get_db_connection() as conn, conn.cursor() as cursor:
+                cursor.execute('SELECT subscription_end FROM premium_users WHERE user_id = %s', (user_id,))
+                result = cursor.fetchone()
+                if result:
+                    return result[0].strftime('%Y-%m-%d')
+        except Exception as e:
+            logger.error(f"Error fetching subscription info: {e}")
+        return "Unknown"
+
+    def get_stats_counts(self) -> Tuple[int, int]:
+        """Get total user and arbitrage record counts from PostgreSQL."""
+        try:
+            with self.get_db_connection() as conn, conn.cursor() as cursor:
+                cursor.execute('''
+                    SELECT
+                        (SELECT COUNT(*) FROM users),
+                        (SELECT COUNT(*) FROM arbitrage_data)
+                ''')
+                total_users, total_arbitrage_records = cursor.fetchone()
+                return total_users, total_arbitrage_records
+        except Exception as e:
+            logger.error(f"Error fetching stats from database: {e}")
+            return 0, 0
+
     def get_user_id_by_username(self, username: str) -> int:
         """Get user ID by username from PostgreSQL database."""
-        conn = self.get_db_connection()
         try:
-            with conn.cursor() as cursor:
+            with self.get_db_connection() as conn, conn.cursor() as cursor:
                 cursor.execute('SELECT user_id FROM users WHERE username = %s', (username,))
                 result = cursor.fetchone()
                 return result[0] if result else None
@@ -831,10 +1091,9 @@ class ArbitrageBot:
 
     def add_premium_user(self, user_id: int, username: str = "", days: int = 30):
         """Add premium user (admin command) to PostgreSQL."""
-        conn = self.get_db_connection()
         try:
-            with conn.cursor() as cursor:
-                end_date = (datetime.now() + timedelta(days=days)).strftime('%Y-%m-%d')
+            with self.get_db_connection() as conn, conn.cursor() as cursor:
+                end_date = (datetime.now() + timedelta(days=days)).date()
                 cursor.execute('''
                     INSERT INTO premium_users 
                     (user_id, username, subscription_end)
@@ -844,35 +1103,33 @@ class ArbitrageBot:
                         subscription_end = EXCLUDED.subscription_end,
                         added_date = CURRENT_TIMESTAMP
                 ''', (user_id, username, end_date))
-            conn.commit()
             self.premium_users.add(user_id)
             logger.info(f"Added premium user: {user_id} (@{username}) for {days} days to PostgreSQL.")
         except Exception as e:
             logger.error(f"Error adding premium user: {e}")
-            conn.rollback()
 
     def remove_premium_user(self, user_id: int):
         """Remove premium user (admin command) from PostgreSQL."""
-        conn = self.get_db_connection()
         try:
-            with conn.cursor() as cursor:
+            with self.get_db_connection() as conn, conn.cursor() as cursor:
                 cursor.execute('DELETE FROM premium_users WHERE user_id = %s', (user_id,))
-                conn.commit()
-                self.premium_users.discard(user_id)
+            self.premium_users.discard(user_id)
         except Exception as e:
             logger.error(f"Error removing premium user: {e}")
-            conn.rollback()
 
     async def cache_refresh_task(self):
-        """Refresh cache every 25 seconds"""
+        """Refresh cache every 25 seconds while it is being read"""
         while True:
             try:
                 await asyncio.sleep(25)
             
                 current_time = time.time()
-                if (current_time - self.cache_timestamp) > 20:
+                if (current_time - self.last_cache_access) > self.idle_refresh_timeout:
+                    # Idle: get_cached_exchange_data refreshes in the foreground once the snapshot is too old
+                    continue
+                if (current_time - self.cache_snapshot[0]) > 20:
                     logger.info("Background cache refresh")
-                    await self._fetch_fresh_data(False)
+                    await self.refresh_cache()
                 
             except Exception as e:
                 logger.error(f"Background cache refresh error: {e}")
@@ -880,25 +1137,26 @@ class ArbitrageBot:
 
     async def get_admin_arbitrage_data(self, is_premium: bool = False):
         """Admin arbitrage data (Huobi excluded, 40% max profit)"""
+        await self.get_cached_exchange_data()
+        cache_timestamp, cache_data = self.cache_snapshot
+        
+        cached = self._admin_arbitrage_results
+        if cached is not None and cached[0] == cache_timestamp:
+            logger.info("Returning cached data for admin")
+            return cached[1]
+        
+        filtered_data = {ex: data for ex, data in cache_data.items() if ex != 'huobi'}
+        
+        # No await while the limit is raised, so other users never see the admin threshold
         original_limit = self.max_profit_threshold
-    
         try:
             self.max_profit_threshold = self.admin_max_profit_threshold
-        
-            current_time = time.time()
-            with self.cache_lock:
-                if (current_time - self.cache_timestamp) < self.cache_duration and self.cache_data:
-                    logger.info("Returning cached data for admin")
-                    filtered_data = {ex: data for ex, data in self.cache_data.items() if ex != 'huobi'}
-                    return self.calculate_arbitrage(filtered_data, True)
-
-            all_data = await self.get_all_prices_with_volume()
-            filtered_data = {ex: data for ex, data in all_data.items() if ex != 'huobi'}
-        
-            return self.calculate_arbitrage(filtered_data, True)
-    
+            opportunities = self.calculate_arbitrage(filtered_data)
         finally:
             self.max_profit_threshold = original_limit
+        
+        self._admin_arbitrage_results = (cache_timestamp, opportunities)
+        return opportunities
 
 # Global bot instance
 bot = ArbitrageBot()
@@ -906,10 +1164,48 @@ bot = ArbitrageBot()
 # Admin user ID - set your Telegram user ID here
 ADMIN_USER_ID = int(os.getenv("ADMIN_USER_ID", "0"))
 
+# Telegram rejects messages over 4096 characters; leave room for footers
+OPPORTUNITY_TEXT_LIMIT = 3600
+
+def format_opportunity(index: int, opp: Dict) -> str:
+    """Format one arbitrage opportunity as a message block"""
+    trust_icon = "✅" if opp['symbol'] in bot.trusted_symbols else "🔍"
+    return (
+        f"{index}. {trust_icon} {opp['symbol']}\n"
+        f"   ⬇️ Buy: {opp['buy_exchange']} ${opp['buy_price']:.6f}\n"
+        f"   ⬆️ Sell: {opp['sell_exchange']} ${opp['sell_price']:.6f}\n"
+        f"   💰 Profit: {opp['profit_percent']:.2f}%\n"
+        f"   📊 Volume: ${opp['avg_volume']:,.0f}\n\n"
+    )
+
+def format_opportunities(header: str, opportunities: List[Dict]) -> str:
+    """Join opportunity blocks under a header, stopping at a block boundary before the size limit"""
+    parts = [header]
+    length = len(header)
+    for i, opp in enumerate(opportunities, 1):
+        block = format_opportunity(i, opp)
+        length += len(block)
+        if length > OPPORTUNITY_TEXT_LIMIT:
+            break
+        parts.append(block)
+    return "".join(parts)
+
+async def reply_chunked(message, text: str, limit: int = 4000):
+    """Reply with text split on line boundaries into Telegram-sized messages"""
+    chunk, length = [], 0
+    for line in text.splitlines(keepends=True):
+        if chunk and length + len(line) > limit:
+            await message.reply_text("".join(chunk))
+            chunk, length = [], 0
+        chunk.append(line)
+        length += len(line)
+    if chunk:
+        await message.reply_text("".join(chunk))
+
 # Command Handlers
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
-    bot.save_user(user.id, user.username or "")
+    await asyncio.to_thread(bot.save_user, user.id, user.username or "")
     
     is_premium = bot.is_premium_user(user.id)
     welcome_text = "🎯 Premium" if is_premium else "🔍 Free"
@@ -976,19 +1272,13 @@ async def handle_arbitrage_check(query):
         )
         return
     
-    text = "💎 Premium Safe Arbitrage:\n\n" if is_premium else f"🔍 Safe Arbitrage (≤{bot.free_user_max_profit}%):\n\n"
+    header = "💎 Premium Safe Arbitrage:\n\n" if is_premium else f"🔍 Safe Arbitrage (≤{bot.free_user_max_profit}%):\n\n"
     
     max_opps = 20 if is_premium else 8
-    for i, opp in enumerate(opportunities[:max_opps], 1):
-        trust_icon = "✅" if opp['symbol'] in bot.trusted_symbols else "🔍"
-        
-        text += f"{i}. {trust_icon} {opp['symbol']}\n"
-        text += f"   ⬇️ Buy: {opp['buy_exchange']} ${opp['buy_price']:.6f}\n"
-        text += f"   ⬆️ Sell: {opp['sell_exchange']} ${opp['sell_price']:.6f}\n"
-        text += f"   💰 Profit: {opp['profit_percent']:.2f}%\n"
-        text += f"   📊 Volume: ${opp['avg_volume']:,.0f}\n\n"
-        
-        if is_premium:
+    text = format_opportunities(header, opportunities[:max_opps])
+    
+    if is_premium:
+        for opp in opportunities[:max_opps]:
             bot.save_arbitrage_data(opp)
     
     if not is_premium:
@@ -1009,18 +1299,15 @@ async def handle_arbitrage_check(query):
     await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
 
 async def show_trusted_symbols(query):
-    text = "✅ **Trusted Cryptocurrencies**\n\n"
-    text += "These coins are verified across all exchanges:\n\n"
-    
-    symbols_list = list(bot.trusted_symbols)
-    symbols_list.sort()
+    symbols_list = sorted(bot.trusted_symbols)
     
+    parts = ["✅ **Trusted Cryptocurrencies**\n\n", "These coins are verified across all exchanges:\n\n"]
     for i in range(0, len(symbols_list), 3):
-        group = symbols_list[i:i+3]
-        text += " • ".join(group) + "\n"
+        parts.append(" • ".join(symbols_list[i:i+3]) + "\n")
     
-    text += f"\n📊 Total: {len(bot.trusted_symbols)} trusted coins"
-    text += "\n🔒 These symbols have additional security validation"
+    parts.append(f"\n📊 Total: {len(bot.trusted_symbols)} trusted coins")
+    parts.append("\n🔒 These symbols have additional security validation")
+    text = "".join(parts)
     
     keyboard = [[InlineKeyboardButton("🔙 Back", callback_data='back')]]
     await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
@@ -1086,11 +1373,19 @@ async def handle_license_activation(update: Update, context: ContextTypes.DEFAUL
     
     await update.message.reply_text("🔄 Verifying license key...")
     
-    if license_key in bot.used_license_keys:
+    if await asyncio.to_thread(bot.is_license_key_used, license_key):
         await update.message.reply_text("❌ This license key has already been used.")
         return
     
-    verification_result = await bot.verify_gumroad_license(license_key)
+    # Gumroad can take seconds to answer; verify in the background so other updates keep flowing
+    context.application.create_task(verify_and_activate_license(update, license_key), update=update)
+
+async def verify_and_activate_license(update: Update, license_key: str):
+    """Verify a license key with Gumroad, activate it and report back to the user"""
+    user = update.effective_user
+    
+    async with bot.license_semaphore:
+        verification_result = await bot.verify_gumroad_license(license_key)
     
     logger.info(f"Verification result: {verification_result}")
     
@@ -1107,13 +1402,29 @@ async def handle_license_activation(update: Update, context: ContextTypes.DEFAUL
         )
         return
     
+    # The same key may have been activated while this verification was in flight
+    if await asyncio.to_thread(bot.is_license_key_used, license_key):
+        await update.message.reply_text("❌ This license key has already been used.")
+        return
+    
     # Lisansı aktifleştir ve bitiş tarihini al
-    end_date = bot.activate_license_key(
-        license_key, 
-        user.id, 
-        user.username or "", 
-        verification_result.get('purchase', {})
-    )
+    try:
+        end_date = await asyncio.to_thread(
+            bot.activate_license_key,
+            license_key, 
+            user.id, 
+            user.username or "", 
+            verification_result.get('purchase', {})
+        )
+    except Exception as e:
+        # Runs as a detached task, so nothing else would tell the user it failed
+        logger.error(f"License activation failed for user {user.id}: {e}")
+        await update.message.reply_text(
+            f"❌ License activation failed.\n\n"
+            f"Your key was verified but could not be activated. "
+            f"If it was not already used, please try again or contact support: {SUPPORT_USERNAME}"
+        )
+        return
     
     # Kullanıcıya bilgi mesajı gönder
     await update.message.reply_text(
@@ -1129,16 +1440,7 @@ async def show_premium_info(query):
     is_premium = bot.is_premium_user(user_id)
     
     if is_premium:
-        conn = bot.get_db_connection()
-        subscription_end = "Unknown"
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute('SELECT subscription_end FROM premium_users WHERE user_id = %s', (user_id,))
-                result = cursor.fetchone()
-                if result:
-                    subscription_end = result[0].strftime('%Y-%m-%d')
-        except Exception as e:
-            logger.error(f"Error fetching subscription info: {e}")
+        subscription_end = await asyncio.to_thread(bot.get_subscription_end, user_id)
         
         text = f"""💎 **Premium Member Benefits**
         
@@ -1205,7 +1507,9 @@ If you subscribe any of plan (Free Trial Included). You will get chance to acces
 
 async def start_background_tasks(app):
     """Start background tasks"""
+    asyncio.create_task(bot.warm_up_connections())
     asyncio.create_task(bot.cache_refresh_task())
+    asyncio.create_task(bot.arbitrage_writer_task())
 
 async def show_help(query):
     text = """ℹ️ **Bot Usage Guide**
@@ -1267,15 +1571,16 @@ async def show_admin_panel(query):
     await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
 
 async def list_premium_users(query):
-    users = bot.get_premium_users_list()
+    users = await asyncio.to_thread(bot.get_premium_users_list)
     
     if not users:
         text = "📋 **Premium Users List**\n\nNo premium users found."
     else:
-        text = f"📋 **Premium Users List** ({len(users)} users)\n\n"
-        for i, user in enumerate(users[:20], 1):
-            text += f"{i}. **{user['username']}** (ID: {user['user_id']})\n"
-            text += f"   └ Until: {user['subscription_end']}\n"
+        text = f"📋 **Premium Users List** ({len(users)} users)\n\n" + "".join(
+            f"{i}. **{user['username']}** (ID: {user['user_id']})\n"
+            f"   └ Until: {user['subscription_end']}\n"
+            for i, user in enumerate(users[:20], 1)
+        )
     
     keyboard = [
         [InlineKeyboardButton("🔄 Refresh", callback_data='list_premium')],
@@ -1302,14 +1607,14 @@ async def remove_premium_command(update: Update, context: ContextTypes.DEFAULT_T
         
         if user_input.isdigit():
             user_id = int(user_input)
-            bot.remove_premium_user(user_id)
+            await asyncio.to_thread(bot.remove_premium_user, user_id)
             await update.message.reply_text(f"✅ User {user_id} removed from premium.")
         else:
             username = user_input.replace('@', '')
             user_id = await get_user_id_by_username(username)
             
             if user_id:
-                bot.remove_premium_user(user_id)
+                await asyncio.to_thread(bot.remove_premium_user, user_id)
                 await update.message.reply_text(f"✅ User @{username} (ID: {user_id}) removed from premium.")
             else:
                 await update.message.reply_text(f"❌ User @{username} not found in database.")
@@ -1339,14 +1644,14 @@ async def add_premium_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         
         if user_input.isdigit():
             user_id = int(user_input)
-            bot.add_premium_user(user_id, "", days)
+            await asyncio.to_thread(bot.add_premium_user, user_id, "", days)
             await update.message.reply_text(f"✅ User {user_id} added as premium for {days} days.")
         else:
             username = user_input.replace('@', '')
             user_id = await get_user_id_by_username(username)
             
             if user_id:
-                bot.add_premium_user(user_id, username, days)
+                await asyncio.to_thread(bot.add_premium_user, user_id, username, days)
                 await update.message.reply_text(f"✅ User @{username} (ID: {user_id}) added as premium for {days} days.")
             else:
                 await update.message.reply_text(f"❌ User @{username} not found in database. User must start the bot first.")
@@ -1358,46 +1663,36 @@ async def add_premium_command(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 async def get_user_id_by_username(username: str) -> int:
     """Get user ID by username from PostgreSQL database"""
-    return bot.get_user_id_by_username(username)
+    return await asyncio.to_thread(bot.get_user_id_by_username, username)
 
 async def list_premium_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != ADMIN_USER_ID:
         await update.message.reply_text("❌ Access denied. Admin only command.")
         return
     
-    users = bot.get_premium_users_list()
+    users = await asyncio.to_thread(bot.get_premium_users_list)
     
     if not users:
         await update.message.reply_text("📋 No premium users found.")
         return
     
-    text = f"📋 **Premium Users** ({len(users)} total)\n\n"
-    for i, user in enumerate(users[:30], 1):
-        text += f"{i}. {user['username']} (ID: {user['user_id']})\n"
-        text += f"   Until: {user['subscription_end']}\n\n"
+    text = f"📋 **Premium Users** ({len(users)} total)\n\n" + "".join(
+        f"{i}. {user['username']} (ID: {user['user_id']})\n"
+        f"   Until: {user['subscription_end']}\n\n"
+        for i, user in enumerate(users[:30], 1)
+    )
     
     if len(users) > 30:
         text += f"... and {len(users) - 30} more users"
     
-    await update.message.reply_text(text)
+    await reply_chunked(update.message, text)
 
 async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != ADMIN_USER_ID:
         await update.message.reply_text("❌ Access denied. Admin only command.")
         return
     
-    conn = bot.get_db_connection()
-    try:
-        with conn.cursor() as cursor:
-            cursor.execute('SELECT COUNT(*) FROM users')
-            total_users = cursor.fetchone()[0]
-            
-            cursor.execute('SELECT COUNT(*) FROM arbitrage_data')
-            total_arbitrage_records = cursor.fetchone()[0]
-    except Exception as e:
-        logger.error(f"Error fetching stats from database: {e}")
-        total_users = 0
-        total_arbitrage_records = 0
+    total_users, total_arbitrage_records = await asyncio.to_thread(bot.get_stats_counts)
     
     text = f"""📊 **Bot Statistics**
 
@@ -1420,7 +1715,7 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 • Bot status: Active
 • Database: Connected"""
     
-    await update.message.reply_text(text)
+    await reply_chunked(update.message, text)
 
 async def admin_check_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != ADMIN_USER_ID:
@@ -1428,7 +1723,7 @@ async def admin_check_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
     
     user = update.effective_user
-    bot.save_user(user.id, user.username or "")
+    await asyncio.to_thread(bot.save_user, user.id, user.username or "")
     
     msg = await update.message.reply_text("🔍 [ADMIN] Scanning exchanges (Huobi excluded, 40% max profit)...")
     
@@ -1440,16 +1735,9 @@ async def admin_check_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         await msg.edit_text("❌ No arbitrage opportunities found (Huobi excluded, max 40% profit).")
         return
     
-    text = "💎 **Admin Arbitrage (Huobi Excluded, Max 40% Profit)**\n\n"
+    text = format_opportunities("💎 **Admin Arbitrage (Huobi Excluded, Max 40% Profit)**\n\n", opportunities[:20])
     
-    for i, opp in enumerate(opportunities[:20], 1):
-        trust_icon = "✅" if opp['symbol'] in bot.trusted_symbols else "🔍"
-        text += f"{i}. {trust_icon} {opp['symbol']}\n"
-        text += f"   ⬇️ Buy: {opp['buy_exchange']} ${opp['buy_price']:.6f}\n"
-        text += f"   ⬆️ Sell: {opp['sell_exchange']} ${opp['sell_price']:.6f}\n"
-        text += f"   💰 Profit: {opp['profit_percent']:.2f}%\n"
-        text += f"   📊 Volume: ${opp['avg_volume']:,.0f}\n\n"
-        
+    for opp in opportunities[:20]:
         bot.save_arbitrage_data(opp)
     
     await msg.edit_text(text)
@@ -1480,90 +1768,115 @@ async def price_check_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     msg = await update.message.reply_text(f"🔄 Fetching data and analyzing safety for **{symbol_to_check}**...")
 
     try:
-        all_exchange_data = await bot.get_all_prices_with_volume()
+        text = await get_price_report(symbol_to_check)
+        await msg.edit_text(text)
 
-        symbol_specific_exchange_data = {}
-        for exchange_name, data_for_exchange in all_exchange_data.items():
-            normalized_symbol = bot.normalize_symbol(symbol_to_check, exchange_name)
-            if normalized_symbol in data_for_exchange:
-                symbol_specific_exchange_data[exchange_name] = data_for_exchange[normalized_symbol]
+    except Exception as e:
+        logger.error(f"Error in price_check_command for {symbol_to_check}: {e}")
+        await msg.edit_text(f"❌ An error occurred while fetching prices for **{symbol_to_check}**.")
 
-        is_safe, safety_reason = bot.is_symbol_safe(symbol_to_check, symbol_specific_exchange_data)
+async def get_price_report(symbol_to_check: str) -> str:
+    """Return the /price report, sharing one computation between concurrent requests"""
+    cached = bot.price_report_cache.get(symbol_to_check)
+    if cached and (time.time() - cached[0]) < bot.price_report_ttl:
+        return cached[1]
+    
+    task = bot._in_flight_price.get(symbol_to_check)
+    if task is None:
+        task = asyncio.create_task(build_price_report(symbol_to_check))
+        bot._in_flight_price[symbol_to_check] = task
+        task.add_done_callback(lambda _: bot._in_flight_price.pop(symbol_to_check, None))
+    
+    text = await asyncio.shield(task)
+    
+    current_time = time.time()
+    if len(bot.price_report_cache) > 256:
+        bot.price_report_cache = {
+            sym: entry for sym, entry in bot.price_report_cache.items()
+            if (current_time - entry[0]) < bot.price_report_ttl
+        }
+    bot.price_report_cache[symbol_to_check] = (current_time, text)
+    return text
 
-        safety_text = f"🛡️ **Security Check for {symbol_to_check}:**\n{safety_reason}\n\n"
+async def build_price_report(symbol_to_check: str) -> str:
+    """Build the /price report text for a symbol"""
+    all_exchange_data = await bot.get_cached_exchange_data()
 
-        if not is_safe:
-            await msg.edit_text(f"❌ Security check failed for **{symbol_to_check}**.\n\n{safety_text}")
-            return
+    symbol_specific_exchange_data = {}
+    for exchange_name, data_for_exchange in all_exchange_data.items():
+        normalized_symbol = bot.normalize_symbol(symbol_to_check, exchange_name)
+        if normalized_symbol in data_for_exchange:
+            symbol_specific_exchange_data[exchange_name] = data_for_exchange[normalized_symbol]
 
-        found_prices = []
-        for exchange_name, data_for_exchange in symbol_specific_exchange_data.items():
-            price = data_for_exchange['price']
-            if price > 0:
-                found_prices.append((exchange_name, price))
-        
-        if not found_prices:
-            await msg.edit_text(f"❌ **{symbol_to_check}** not found on any monitored exchange, or prices are unavailable.\n\n{safety_text}")
-            return
+    is_safe, safety_reason = bot.is_symbol_safe(symbol_to_check, symbol_specific_exchange_data)
 
-        text = f"📈 **{symbol_to_check} Prices Across Exchanges**\n\n"
-        
-        found_prices.sort(key=lambda x: x[1])
-        for exchange, price in found_prices:
-            text += f"• {exchange.capitalize()}: `${price:.6f}`\n"
-        
-        cheapest_exchange, cheapest_price = found_prices[0]
-        most_expensive_exchange, most_expensive_price = found_prices[-1]
-        
-        price_difference = most_expensive_price - cheapest_price
-        
-        if cheapest_price > 0:
-            percentage_difference = (price_difference / cheapest_price) * 100
-            text += f"\nLowest Price: {cheapest_exchange.capitalize()} `${cheapest_price:.6f}`\n"
-            text += f"Highest Price: {most_expensive_exchange.capitalize()} `${most_expensive_price:.6f}`\n"
-            text += f"Absolute Difference: `${price_difference:.6f}`\n"
-            text += f"Percentage Difference: `{percentage_difference:.2f}%`\n\n"
-        else:
-             text += "\nCould not calculate percentage difference (cheapest price is zero).\n\n"
+    safety_text = f"🛡️ **Security Check for {symbol_to_check}:**\n{safety_reason}\n\n"
 
-        text += safety_text
+    if not is_safe:
+        return f"❌ Security check failed for **{symbol_to_check}**.\n\n{safety_text}"
 
-        await msg.edit_text(text)
+    found_prices = []
+    for exchange_name, data_for_exchange in symbol_specific_exchange_data.items():
+        price = data_for_exchange.price
+        if price > 0:
+            found_prices.append((exchange_name, price))
+    
+    if not found_prices:
+        return f"❌ **{symbol_to_check}** not found on any monitored exchange, or prices are unavailable.\n\n{safety_text}"
 
-    except Exception as e:
-        logger.error(f"Error in price_check_command for {symbol_to_check}: {e}")
-        await msg.edit_text(f"❌ An error occurred while fetching prices for **{symbol_to_check}**.")
+    found_prices.sort(key=itemgetter(1))
+    
+    parts = [f"📈 **{symbol_to_check} Prices Across Exchanges**\n\n"]
+    display_names = bot.exchange_display_names
+    parts.extend(f"• {display_names[exchange]}: `${price:.6f}`\n" for exchange, price in found_prices)
+    
+    # Only positive prices are collected above, so the cheapest one is a safe divisor
+    cheapest_exchange, cheapest_price = found_prices[0]
+    most_expensive_exchange, most_expensive_price = found_prices[-1]
+    
+    price_difference = most_expensive_price - cheapest_price
+    percentage_difference = (price_difference / cheapest_price) * 100
+    parts.append(
+        f"\nLowest Price: {display_names[cheapest_exchange]} `${cheapest_price:.6f}`\n"
+        f"Highest Price: {display_names[most_expensive_exchange]} `${most_expensive_price:.6f}`\n"
+        f"Absolute Difference: `${price_difference:.6f}`\n"
+        f"Percentage Difference: `{percentage_difference:.2f}%`\n\n"
+    )
+    
+    parts.append(safety_text)
+    return "".join(parts)
 
 async def check_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
-    bot.save_user(user.id, user.username or "")
+    await asyncio.to_thread(bot.save_user, user.id, user.username or "")
     
     msg = await update.message.reply_text("🔄 Scanning arbitrage opportunities...")
     
     await asyncio.sleep(3)
     
-    all_data = await bot.get_all_prices_with_volume()
     is_premium = bot.is_premium_user(user.id)
     
-    opportunities = bot.calculate_arbitrage(all_data, is_premium)
+    opportunities = await bot.get_cached_arbitrage_data(is_premium)
     
     if not opportunities:
         await msg.edit_text("❌ No safe arbitrage opportunities found at the moment.")
         return
     
-    text = f"🔍 Quick Arbitrage Scan Results:\n\n"
+    parts = ["🔍 Quick Arbitrage Scan Results:\n\n"]
     
     max_opps = 10 if is_premium else 5
     for i, opp in enumerate(opportunities[:max_opps], 1):
         trust_icon = "✅" if opp['symbol'] in bot.trusted_symbols else "🔍"
-        text += f"{i}. {trust_icon} {opp['symbol']}\n"
-        text += f"   💰 {opp['profit_percent']:.2f}% profit\n"
-        text += f"   📊 ${opp['avg_volume']:,.0f} volume\n\n"
+        parts.append(
+            f"{i}. {trust_icon} {opp['symbol']}\n"
+            f"   💰 {opp['profit_percent']:.2f}% profit\n"
+            f"   📊 ${opp['avg_volume']:,.0f} volume\n\n"
+        )
     
     if not is_premium and len(opportunities) > max_opps:
-        text += f"💎 {len(opportunities) - max_opps} more opportunities available with premium!"
+        parts.append(f"💎 {len(opportunities) - max_opps} more opportunities available with premium!")
     
-    await msg.edit_text(text)
+    await msg.edit_text("".join(parts))
 
 def main():
     TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -1577,36 +1890,52 @@ def main():
     if ADMIN_USER_ID == 0:
         logger.warning("ADMIN_USER_ID not set! Admin commands will not work.")
     
+    if WEBHOOK_URL and not WEBHOOK_SECRET:
+        logger.error("WEBHOOK_SECRET environment variable is required when WEBHOOK_URL is set!")
+        return
+    
     app = Application.builder().token(TOKEN).build()
 
     app.post_init = start_background_tasks
     
-    # Command handlers
+    # Command handlers; block=False on the ones that wait on exchange data so they
+    # do not hold up updates from other chats
     app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("check", check_command))
+    app.add_handler(CommandHandler("check", check_command, block=False))
     app.add_handler(CommandHandler("addpremium", add_premium_command))
     app.add_handler(CommandHandler("removepremium", remove_premium_command))
     app.add_handler(CommandHandler("listpremium", list_premium_command))
     app.add_handler(CommandHandler("stats", stats_command))
-    app.add_handler(CommandHandler("admincheck", admin_check_command))
-    app.add_handler(CommandHandler("price", price_check_command))
+    app.add_handler(CommandHandler("admincheck", admin_check_command, block=False))
+    app.add_handler(CommandHandler("price", price_check_command, block=False))
     
     # Message handlers
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_license_activation))
     
     # Callback handlers
-    app.add_handler(CallbackQueryHandler(button_handler))
+    app.add_handler(CallbackQueryHandler(button_handler, block=False))
 
     async def cleanup():
+        bot.flush_arbitrage_queue()
         if bot.session and not bot.session.closed:
             await bot.session.close()
-        if bot.conn and not bot.conn.closed:
-            bot.conn.close()
-            logger.info("PostgreSQL database connection closed.")
+        if not bot.pool.closed:
+            bot.pool.closeall()
+            logger.info("PostgreSQL connection pool closed.")
     
     app.post_stop = cleanup
     
-    app.run_polling()
+    if WEBHOOK_URL:
+        # Telegram pushes updates, so there is no getUpdates long-poll loop
+        app.run_webhook(
+            listen="0.0.0.0",
+            port=WEBHOOK_PORT,
+            url_path=TOKEN,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{TOKEN}",
+            secret_token=WEBHOOK_SECRET
+        )
+    else:
+        app.run_polling()
     
     logger.info("Advanced Arbitrage Bot starting...")
     logger.info(f"Monitoring {len(bot.exchanges)} exchanges")